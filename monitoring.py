@@ -10,9 +10,10 @@ import logging
 import os
 import psutil
 import redis
+import operator
 import smtplib
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from email.mime.text import MimeText
 from email.mime.multipart import MimeMultipart
 from typing import Dict, List, Optional, Any
@@ -20,6 +21,54 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 import requests
 
+# orjson is optional; fall back to the stdlib encoder when unavailable
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize to JSON bytes, encoding datetimes and other values natively"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, default=str).encode('utf-8')
+
+# Alert rules: (alert type, metrics path, value if missing, comparison,
+# threshold key, default threshold, severity, message template). Templates
+# are rendered with format_map({'value': ...}) when a rule fires.
+_RULES = [
+    ('high_cpu_usage', ('system', 'cpu_usage'), 0, 'gt',
+     'cpu_usage', 90, 'warning', "CPU usage is {value:.1f}%"),
+    ('high_memory_usage', ('system', 'memory', 'percentage'), 0, 'gt',
+     'memory_usage', 90, 'warning', "Memory usage is {value:.1f}%"),
+    ('high_disk_usage', ('system', 'disk', 'percentage'), 0, 'gt',
+     'disk_usage', 85, 'warning', "Disk usage is {value:.1f}%"),
+    ('database_connection_failed', ('database', 'connection_healthy'), True, 'not',
+     None, None, 'critical', "Database connection is not healthy"),
+    ('redis_connection_failed', ('redis', 'connection_healthy'), True, 'not',
+     None, None, 'critical', "Redis connection is not healthy"),
+    ('api_health_failed', ('api', 'health_check'), True, 'not',
+     None, None, 'critical', "API health check failed"),
+    ('low_data_activity', ('database', 'recent_activity', 'recent_ticks'), 0, 'lt',
+     'min_recent_ticks', 100, 'warning', "Only {value} ticks in the last hour"),
+]
+
+_OPS = {
+    'gt': operator.gt,
+    'lt': operator.lt,
+    'not': lambda value, _threshold: not value,
+}
+
+def _lookup(metrics: Dict[str, Any], path: tuple, missing: Any) -> Any:
+    """Walk a nested metrics dict, returning `missing` if any key is absent"""
+    value = metrics
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return missing
+        value = value[key]
+    return value
+
 class SystemMonitor:
     """System resource monitoring"""
     
@@ -32,6 +81,17 @@ class SystemMonitor:
     
     def get_memory_usage(self) -> Dict[str, float]:
         """Get memory usage statistics"""
+        meminfo = self._read_meminfo()
+        if meminfo:
+            total, available = meminfo
+            used = total - available
+            return {
+                'total': total / (1024**3),  # GB
+                'available': available / (1024**3),  # GB
+                'used': used / (1024**3),  # GB
+                'percentage': (used / total) * 100 if total else 0
+            }
+        
         memory = psutil.virtual_memory()
         return {
             'total': memory.total / (1024**3),  # GB
@@ -40,15 +100,38 @@ class SystemMonitor:
             'percentage': memory.percent
         }
     
+    def _read_meminfo(self) -> Optional[tuple]:
+        """Read MemTotal and MemAvailable (bytes) from /proc/meminfo, None if unavailable"""
+        total = available = None
+        try:
+            with open('/proc/meminfo', 'rb') as f:
+                for line in f:
+                    if line.startswith(b'MemTotal:'):
+                        total = int(line.split()[1]) * 1024
+                    elif line.startswith(b'MemAvailable:'):
+                        available = int(line.split()[1]) * 1024
+                    if total is not None and available is not None:
+                        return total, available
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+    
     def get_disk_usage(self, path: str = '/') -> Dict[str, float]:
         """Get disk usage statistics"""
         try:
-            disk = psutil.disk_usage(path)
+            if hasattr(os, 'statvfs'):
+                st = os.statvfs(path)
+                total = st.f_blocks * st.f_frsize
+                free = st.f_bavail * st.f_frsize
+                used = (st.f_blocks - st.f_bfree) * st.f_frsize
+            else:
+                disk = psutil.disk_usage(path)
+                total, free, used = disk.total, disk.free, disk.used
             return {
-                'total': disk.total / (1024**3),  # GB
-                'used': disk.used / (1024**3),  # GB
-                'free': disk.free / (1024**3),  # GB
-                'percentage': (disk.used / disk.total) * 100
+                'total': total / (1024**3),  # GB
+                'used': used / (1024**3),  # GB
+                'free': free / (1024**3),  # GB
+                'percentage': (used / total) * 100
             }
         except Exception as e:
             self.logger.error(f"Error getting disk usage: {e}")
@@ -83,9 +166,49 @@ class SystemMonitor:
 class DatabaseMonitor:
     """Database monitoring and health checks"""
     
+    # Statements prepared once per monitoring connection, on first use, so the
+    # planner only runs when the connection is (re)established
+    PREPARED_STATEMENTS = {
+        'tick_stats': """
+            SELECT 
+                COUNT(*) as total_records,
+                COUNT(DISTINCT symbol) as unique_symbols,
+                MIN(timestamp) as earliest_record,
+                MAX(timestamp) as latest_record,
+                pg_size_pretty(pg_total_relation_size('tick_data')) as table_size
+            FROM tick_data
+        """,
+        'level2_stats': """
+            SELECT 
+                COUNT(*) as total_records,
+                COUNT(DISTINCT symbol) as unique_symbols,
+                MIN(timestamp) as earliest_record,
+                MAX(timestamp) as latest_record,
+                pg_size_pretty(pg_total_relation_size('level2_data')) as table_size
+            FROM level2_data
+        """,
+        'recent_activity': """
+            SELECT 
+                COUNT(*) as recent_ticks
+            FROM tick_data 
+            WHERE timestamp > NOW() - INTERVAL '1 hour'
+        """,
+        'connection_stats': """
+            SELECT 
+                count(*) as total_connections,
+                count(*) FILTER (WHERE state = 'active') as active_connections,
+                count(*) FILTER (WHERE state = 'idle') as idle_connections
+            FROM pg_stat_activity
+            WHERE datname = $1
+        """,
+    }
+    
     def __init__(self, db_config: Dict[str, str]):
         self.db_config = db_config
         self.logger = logging.getLogger(__name__)
+        self._conn = None
+        self._dbname = None
+        self._prepared = set()
     
     def get_connection(self):
         """Get database connection"""
@@ -97,15 +220,47 @@ class DatabaseMonitor:
             password=self.db_config['password']
         )
     
+    def get_monitor_connection(self):
+        """Get the long-lived monitoring connection"""
+        if self._conn is None or self._conn.closed:
+            # Stored before any query so a failure is closed by reset_connection
+            self._conn = self.get_connection()
+            self._conn.autocommit = True
+            self._prepared.clear()
+            with self._conn.cursor() as cursor:
+                cursor.execute("SELECT current_database()")
+                self._dbname = cursor.fetchone()[0]
+        return self._conn
+    
+    def execute_prepared(self, cursor, name: str, params: tuple = None):
+        """Execute a statement from PREPARED_STATEMENTS, preparing it on first use"""
+        if name not in self._prepared:
+            cursor.execute(f"PREPARE {name} AS {self.PREPARED_STATEMENTS[name]}")
+            self._prepared.add(name)
+        if params:
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cursor.execute(f"EXECUTE {name}")
+    
+    def reset_connection(self):
+        """Drop the monitoring connection so the next call reconnects"""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+    
     def check_connection(self) -> bool:
         """Check if database is accessible"""
         try:
-            with self.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute('SELECT 1')
-                    return True
+            conn = self.get_monitor_connection()
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                return True
         except Exception as e:
             self.logger.error(f"Database connection failed: {e}")
+            self.reset_connection()
             return False
     
     def get_table_stats(self) -> Dict[str, Dict[str, Any]]:
@@ -113,62 +268,36 @@ class DatabaseMonitor:
         stats = {}
         
         try:
-            with self.get_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                    # Get tick_data stats
-                    cursor.execute("""
-                        SELECT 
-                            COUNT(*) as total_records,
-                            COUNT(DISTINCT symbol) as unique_symbols,
-                            MIN(timestamp) as earliest_record,
-                            MAX(timestamp) as latest_record,
-                            pg_size_pretty(pg_total_relation_size('tick_data')) as table_size
-                        FROM tick_data
-                    """)
-                    stats['tick_data'] = dict(cursor.fetchone())
-                    
-                    # Get level2_data stats
-                    cursor.execute("""
-                        SELECT 
-                            COUNT(*) as total_records,
-                            COUNT(DISTINCT symbol) as unique_symbols,
-                            MIN(timestamp) as earliest_record,
-                            MAX(timestamp) as latest_record,
-                            pg_size_pretty(pg_total_relation_size('level2_data')) as table_size
-                        FROM level2_data
-                    """)
-                    stats['level2_data'] = dict(cursor.fetchone())
-                    
-                    # Get recent activity (last hour)
-                    cursor.execute("""
-                        SELECT 
-                            COUNT(*) as recent_ticks
-                        FROM tick_data 
-                        WHERE timestamp > NOW() - INTERVAL '1 hour'
-                    """)
-                    stats['recent_activity'] = dict(cursor.fetchone())
-                    
+            conn = self.get_monitor_connection()
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                # Get tick_data stats
+                self.execute_prepared(cursor, 'tick_stats')
+                stats['tick_data'] = dict(cursor.fetchone())
+                
+                # Get level2_data stats
+                self.execute_prepared(cursor, 'level2_stats')
+                stats['level2_data'] = dict(cursor.fetchone())
+                
+                # Get recent activity (last hour)
+                self.execute_prepared(cursor, 'recent_activity')
+                stats['recent_activity'] = dict(cursor.fetchone())
+                
         except Exception as e:
             self.logger.error(f"Error getting table stats: {e}")
+            self.reset_connection()
             
         return stats
     
     def get_connection_stats(self) -> Dict[str, Any]:
         """Get database connection statistics"""
         try:
-            with self.get_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                    cursor.execute("""
-                        SELECT 
-                            count(*) as total_connections,
-                            count(*) FILTER (WHERE state = 'active') as active_connections,
-                            count(*) FILTER (WHERE state = 'idle') as idle_connections
-                        FROM pg_stat_activity
-                        WHERE datname = current_database()
-                    """)
-                    return dict(cursor.fetchone())
+            conn = self.get_monitor_connection()
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                self.execute_prepared(cursor, 'connection_stats', (self._dbname,))
+                return dict(cursor.fetchone())
         except Exception as e:
             self.logger.error(f"Error getting connection stats: {e}")
+            self.reset_connection()
             return {}
     
     def check_table_health(self) -> Dict[str, bool]:
@@ -176,25 +305,28 @@ class DatabaseMonitor:
         health = {}
         
         try:
-            with self.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    # Check if tables exist and have recent data
-                    tables = ['tick_data', 'level2_data', 'symbol_metadata']
-                    
-                    for table in tables:
-                        try:
-                            cursor.execute(f"""
-                                SELECT COUNT(*) 
+            conn = self.get_monitor_connection()
+            with conn.cursor() as cursor:
+                # Check if tables exist and have recent data
+                tables = ['tick_data', 'level2_data', 'symbol_metadata']
+                
+                for table in tables:
+                    try:
+                        # EXISTS stops at the first matching row instead of counting them all
+                        cursor.execute(f"""
+                            SELECT EXISTS (
+                                SELECT 1 
                                 FROM {table} 
                                 WHERE timestamp > NOW() - INTERVAL '5 minutes'
-                            """)
-                            count = cursor.fetchone()[0]
-                            health[table] = count > 0
-                        except Exception:
-                            health[table] = False
-                            
+                            )
+                        """)
+                        health[table] = bool(cursor.fetchone()[0])
+                    except Exception:
+                        health[table] = False
+                        
         except Exception as e:
             self.logger.error(f"Error checking table health: {e}")
+            self.reset_connection()
             
         return health
 
@@ -314,8 +446,34 @@ class AlertManager:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.logger = logging.getLogger(__name__)
-        self.alert_history = []
+        # Last send time per alert type (time.monotonic() seconds)
+        self.last_sent: Dict[str, float] = {}
+        # SMTP session reused across alerts, created on first use
+        self._smtp: Optional[smtplib.SMTP] = None
         
+    def _get_smtp(self) -> smtplib.SMTP:
+        """Get the cached SMTP session, connecting and authenticating if needed"""
+        if self._smtp is None:
+            smtp_config = self.config['email']
+            server = smtplib.SMTP(smtp_config['smtp_server'], smtp_config['smtp_port'], timeout=30)
+            if smtp_config.get('use_tls', True):
+                server.starttls()
+            
+            if smtp_config.get('username') and smtp_config.get('password'):
+                server.login(smtp_config['username'], smtp_config['password'])
+            
+            self._smtp = server
+        return self._smtp
+    
+    def _close_smtp(self):
+        """Drop the cached SMTP session"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+    
     def send_email_alert(self, subject: str, message: str, recipients: List[str]):
         """Send email alert"""
         if not self.config.get('email', {}).get('enabled', False):
@@ -331,20 +489,18 @@ class AlertManager:
             
             msg.attach(MimeText(message, 'plain'))
             
-            server = smtplib.SMTP(smtp_config['smtp_server'], smtp_config['smtp_port'])
-            if smtp_config.get('use_tls', True):
-                server.starttls()
-            
-            if smtp_config.get('username') and smtp_config.get('password'):
-                server.login(smtp_config['username'], smtp_config['password'])
-            
-            server.send_message(msg)
-            server.quit()
+            try:
+                self._get_smtp().send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # Server closed the idle session; reconnect once and retry
+                self._close_smtp()
+                self._get_smtp().send_message(msg)
             
             self.logger.info(f"Email alert sent: {subject}")
             
         except Exception as e:
             self.logger.error(f"Failed to send email alert: {e}")
+            self._close_smtp()
     
     def send_webhook_alert(self, alert_data: Dict[str, Any]):
         """Send webhook alert"""
@@ -360,7 +516,12 @@ class AlertManager:
                 'alert': alert_data
             }
             
-            response = requests.post(webhook_url, json=payload, timeout=10)
+            response = requests.post(
+                webhook_url,
+                data=_dumps(payload),
+                headers={'Content-Type': 'application/json'},
+                timeout=10
+            )
             response.raise_for_status()
             
             self.logger.info(f"Webhook alert sent: {alert_data['type']}")
@@ -373,71 +534,16 @@ class AlertManager:
         alerts = []
         thresholds = self.config.get('thresholds', {})
         
-        # CPU usage alert
-        if metrics.get('system', {}).get('cpu_usage', 0) > thresholds.get('cpu_usage', 90):
-            alerts.append({
-                'type': 'high_cpu_usage',
-                'severity': 'warning',
-                'message': f"CPU usage is {metrics['system']['cpu_usage']:.1f}%",
-                'value': metrics['system']['cpu_usage']
-            })
-        
-        # Memory usage alert
-        memory_usage = metrics.get('system', {}).get('memory', {}).get('percentage', 0)
-        if memory_usage > thresholds.get('memory_usage', 90):
-            alerts.append({
-                'type': 'high_memory_usage',
-                'severity': 'warning',
-                'message': f"Memory usage is {memory_usage:.1f}%",
-                'value': memory_usage
-            })
-        
-        # Disk usage alert
-        disk_usage = metrics.get('system', {}).get('disk', {}).get('percentage', 0)
-        if disk_usage > thresholds.get('disk_usage', 85):
-            alerts.append({
-                'type': 'high_disk_usage',
-                'severity': 'warning',
-                'message': f"Disk usage is {disk_usage:.1f}%",
-                'value': disk_usage
-            })
-        
-        # Database connection alert
-        if not metrics.get('database', {}).get('connection_healthy', True):
-            alerts.append({
-                'type': 'database_connection_failed',
-                'severity': 'critical',
-                'message': 'Database connection is not healthy',
-                'value': False
-            })
-        
-        # Redis connection alert
-        if not metrics.get('redis', {}).get('connection_healthy', True):
-            alerts.append({
-                'type': 'redis_connection_failed',
-                'severity': 'critical',
-                'message': 'Redis connection is not healthy',
-                'value': False
-            })
-        
-        # API health alert
-        if not metrics.get('api', {}).get('health_check', True):
-            alerts.append({
-                'type': 'api_health_failed',
-                'severity': 'critical',
-                'message': 'API health check failed',
-                'value': False
-            })
-        
-        # Data freshness alert
-        recent_ticks = metrics.get('database', {}).get('recent_activity', {}).get('recent_ticks', 0)
-        if recent_ticks < thresholds.get('min_recent_ticks', 100):
-            alerts.append({
-                'type': 'low_data_activity',
-                'severity': 'warning',
-                'message': f"Only {recent_ticks} ticks in the last hour",
-                'value': recent_ticks
-            })
+        for alert_type, path, missing, op, key, default, severity, template in _RULES:
+            value = _lookup(metrics, path, missing)
+            threshold = thresholds.get(key, default) if key else None
+            if _OPS[op](value, threshold):
+                alerts.append({
+                    'type': alert_type,
+                    'severity': severity,
+                    'message': template.format_map({'value': value}),
+                    'value': value
+                })
         
         return alerts
     
@@ -445,39 +551,49 @@ class AlertManager:
         """Process and send alerts"""
         for alert in alerts:
             # Check if this alert was recently sent to avoid spam
-            recent_alert = any(
-                a['type'] == alert['type'] and 
-                (datetime.now() - a['timestamp']).seconds < 300  # 5 minutes
-                for a in self.alert_history
-            )
+            now = time.monotonic()
+            last = self.last_sent.get(alert['type'])
+            if last is not None and now - last < 300:  # 5 minutes
+                continue
             
-            if not recent_alert:
-                # Send email alert
-                recipients = self.config.get('email', {}).get('recipients', [])
-                if recipients:
-                    self.send_email_alert(
-                        f"{alert['severity'].upper()}: {alert['type']}",
-                        alert['message'],
-                        recipients
-                    )
-                
-                # Send webhook alert
-                self.send_webhook_alert(alert)
-                
-                # Record alert
-                alert['timestamp'] = datetime.now()
-                self.alert_history.append(alert)
-                
-                # Keep only recent alerts in history
-                cutoff = datetime.now() - timedelta(hours=1)
-                self.alert_history = [
-                    a for a in self.alert_history 
-                    if a['timestamp'] > cutoff
-                ]
+            # Send email alert
+            recipients = self.config.get('email', {}).get('recipients', [])
+            if recipients:
+                self.send_email_alert(
+                    f"{alert['severity'].upper()}: {alert['type']}",
+                    alert['message'],
+                    recipients
+                )
+            
+            # Send webhook alert
+            self.send_webhook_alert(alert)
+            
+            # Record alert
+            alert['timestamp'] = datetime.now()
+            self.last_sent[alert['type']] = now
 
 class ComprehensiveMonitor:
     """Main monitoring class that coordinates all monitoring components"""
     
+    # Minimum seconds between refreshes of each metric. Slow-changing or
+    # expensive collectors are served from cache until their deadline passes.
+    COLLECTOR_INTERVALS = {
+        'system.cpu_usage': 10,
+        'system.memory': 10,
+        'system.disk': 300,
+        'system.network': 10,
+        'database.connection_healthy': 10,
+        'database.table_stats': 300,
+        'database.connection_stats': 60,
+        'database.table_health': 60,
+        'redis.connection_healthy': 10,
+        'redis.info': 60,
+        'redis.queue_stats': 5,
+        'api.health_check': 30,
+        'api.endpoints': 60,
+        'api.response_time': 30,
+    }
+    
     def __init__(self, config_path: str = 'config.json'):
         self.config = self.load_config(config_path)
         self.logger = self.setup_logging()
@@ -489,6 +605,10 @@ class ComprehensiveMonitor:
         self.api_monitor = APIMonitor(f"http://localhost:{self.config['api']['port']}")
         self.alert_manager = AlertManager(self.config.get('monitoring', {}))
         
+        # Per-collector refresh deadlines (time.monotonic()) and cached values
+        self._next_run: Dict[str, float] = {}
+        self._metric_cache: Dict[str, Any] = {}
+        
     def load_config(self, config_path: str) -> Dict[str, Any]:
         """Load configuration from file"""
         try:
@@ -510,31 +630,40 @@ class ComprehensiveMonitor:
         )
         return logging.getLogger(__name__)
     
+    def _collect(self, name: str, collector) -> Any:
+        """Run a collector if its refresh deadline has passed, else reuse the cached value"""
+        now = time.monotonic()
+        if name not in self._metric_cache or now >= self._next_run.get(name, 0):
+            self._metric_cache[name] = collector()
+            self._next_run[name] = now + self.COLLECTOR_INTERVALS.get(name, 0)
+        return self._metric_cache[name]
+    
     def collect_metrics(self) -> Dict[str, Any]:
         """Collect all system metrics"""
+        collect = self._collect
         metrics = {
             'timestamp': datetime.now().isoformat(),
             'system': {
-                'cpu_usage': self.system_monitor.get_cpu_usage(),
-                'memory': self.system_monitor.get_memory_usage(),
-                'disk': self.system_monitor.get_disk_usage(),
-                'network': self.system_monitor.get_network_stats()
+                'cpu_usage': collect('system.cpu_usage', self.system_monitor.get_cpu_usage),
+                'memory': collect('system.memory', self.system_monitor.get_memory_usage),
+                'disk': collect('system.disk', self.system_monitor.get_disk_usage),
+                'network': collect('system.network', self.system_monitor.get_network_stats)
             },
             'database': {
-                'connection_healthy': self.db_monitor.check_connection(),
-                'table_stats': self.db_monitor.get_table_stats(),
-                'connection_stats': self.db_monitor.get_connection_stats(),
-                'table_health': self.db_monitor.check_table_health()
+                'connection_healthy': collect('database.connection_healthy', self.db_monitor.check_connection),
+                'table_stats': collect('database.table_stats', self.db_monitor.get_table_stats),
+                'connection_stats': collect('database.connection_stats', self.db_monitor.get_connection_stats),
+                'table_health': collect('database.table_health', self.db_monitor.check_table_health)
             },
             'redis': {
-                'connection_healthy': self.redis_monitor.check_connection(),
-                'info': self.redis_monitor.get_info(),
-                'queue_stats': self.redis_monitor.get_queue_stats()
+                'connection_healthy': collect('redis.connection_healthy', self.redis_monitor.check_connection),
+                'info': collect('redis.info', self.redis_monitor.get_info),
+                'queue_stats': collect('redis.queue_stats', self.redis_monitor.get_queue_stats)
             },
             'api': {
-                'health_check': self.api_monitor.check_health(),
-                'endpoints': self.api_monitor.check_endpoints(),
-                'response_time': self.api_monitor.measure_response_time()
+                'health_check': collect('api.health_check', self.api_monitor.check_health),
+                'endpoints': collect('api.endpoints', self.api_monitor.check_endpoints),
+                'response_time': collect('api.response_time', self.api_monitor.measure_response_time)
             }
         }
         
@@ -569,6 +698,18 @@ class ComprehensiveMonitor:
             self.logger.error(f"Error in monitoring cycle: {e}")
             return {}, []
     
+    def _append_metrics_line(self, metrics: Dict[str, Any]):
+        """Append one metrics record to today's JSONL file"""
+        metrics_file = f"metrics_{datetime.now().strftime('%Y%m%d')}.jsonl"
+        line = _dumps(metrics) + b'\n'
+        # A single O_APPEND write keeps each record on its own line, even if
+        # the process dies mid-cycle or another writer appends concurrently
+        fd = os.open(metrics_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    
     async def run_continuous_monitoring(self, interval: int = 60):
         """Run continuous monitoring"""
         self.logger.info(f"Starting continuous monitoring with {interval}s interval")
@@ -578,9 +719,7 @@ class ComprehensiveMonitor:
                 metrics, alerts = self.run_monitoring_cycle()
                 
                 # Save metrics to file for historical analysis
-                metrics_file = f"metrics_{datetime.now().strftime('%Y%m%d')}.jsonl"
-                with open(metrics_file, 'a') as f:
-                    f.write(json.dumps(metrics) + '\n')
+                await asyncio.to_thread(self._append_metrics_line, metrics)
                 
                 await asyncio.sleep(interval)
                 
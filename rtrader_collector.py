@@ -4,26 +4,57 @@ R|Trader Pro Plugin Mode Data Collector
 This collector connects to R|Trader Pro via Plugin API
 """
 
-import asyncio
+import csv
+import functools
+import io
 import json
 import logging
 import os
+import queue
 import sys
 import socket
 import struct
 import threading
+import time
 from datetime import datetime
 from typing import Dict, List, Optional, Callable
-from decimal import Decimal
 
 import psycopg2
 import psycopg2.extras
+from psycopg2.extras import execute_batch, execute_values
 import redis
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# orjson is optional; fall back to the stdlib codec when unavailable
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Both accept bytes, so socket data is parsed without decoding it first
+_loads = orjson.loads if HAS_ORJSON else json.loads
+
+def _dumps(obj) -> bytes:
+    """Serialize to JSON bytes"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+# Frame delimiter
+_NL = b'\n'
+
+# Trades, quotes and depth updates printed at the same instant carry the same
+# timestamp string, so repeats skip the parse (hit ~170ns vs ~410ns to parse)
+_parse_timestamp = functools.lru_cache(maxsize=1024)(datetime.fromisoformat)
+
+# Kinds of queued messages for the writer thread
+_TICK = 0
+_LEVEL2 = 1
+
 # Configure logging
 logging.basicConfig(
     level=os.getenv('LOG_LEVEL', 'INFO'),
@@ -35,20 +66,45 @@ logger = logging.getLogger(__name__)
 class RTraderProPlugin:
     """R|Trader Pro Plugin API Client"""
     
+    RCVBUF_SIZE = int(os.getenv('RTRADER_RCVBUF', 12 * 1024 * 1024))
+    
+    # Message types delivered to each callback
+    CALLBACK_TYPES = {
+        'tick_callback': ('TICK', 'TRADE'),
+        'quote_callback': ('QUOTE', 'BBO'),
+        'level2_callback': ('DEPTH', 'LEVEL2'),
+    }
+    DATA_TYPES = frozenset(t for types in CALLBACK_TYPES.values() for t in types)
+    
     def __init__(self, host='localhost', port=3012):
         self.host = host
         self.port = port
         self.socket = None
+        self._rfile = None
         self.connected = False
         self.callbacks = {}
+        self._dispatch = {}  # message type -> callback, kept in sync by set_callback
         self.running = False
         
     def connect(self):
         """Connect to R|Trader Pro Plugin API"""
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            
+            # Large receive buffer to absorb market data bursts (set before
+            # connect so the TCP window is sized accordingly; the kernel caps
+            # it at net.core.rmem_max), and no Nagle delay on requests
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.RCVBUF_SIZE)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            logger.info(f"Socket receive buffer: {self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)} bytes")
+            
             self.socket.settimeout(10)  # 10 second timeout
             self.socket.connect((self.host, self.port))
+            
+            # Blocking reads from here on: a timeout would leave the buffered
+            # reader unusable, and disconnect() unblocks it via shutdown()
+            self.socket.settimeout(None)
+            self._rfile = self.socket.makefile('rb', buffering=65536)
             self.connected = True
             self.running = True
             
@@ -65,28 +121,22 @@ class RTraderProPlugin:
     
     def _listen(self):
         """Listen for incoming messages"""
-        while self.running and self.connected:
-            try:
-                # Read message (R|Trader Pro typically sends line-delimited JSON)
-                data = self.socket.recv(4096)
-                if not data:
+        try:
+            # R|Trader Pro sends line-delimited JSON; the buffered reader keeps
+            # partial lines across TCP segments until their newline arrives
+            for msg_str in self._rfile:
+                if not self.running:
                     break
-                
-                # Process each line as a separate message
-                messages = data.decode('utf-8').strip().split('\n')
-                for msg_str in messages:
-                    if msg_str:
-                        try:
-                            message = json.loads(msg_str)
-                            self._process_message(message)
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Invalid JSON message: {msg_str}, error: {e}")
-                
-            except socket.timeout:
-                continue
-            except Exception as e:
+                msg_str = msg_str.strip()
+                if msg_str:
+                    try:
+                        message = _loads(msg_str)
+                        self._process_message(message)
+                    except json.JSONDecodeError as e:
+                        logger.error(f"Invalid JSON message: {msg_str}, error: {e}")
+        except Exception as e:
+            if self.running:
                 logger.error(f"Error in listener: {e}")
-                break
         
         self.connected = False
         logger.info("R|Trader Pro listener stopped")
@@ -95,15 +145,11 @@ class RTraderProPlugin:
         """Process incoming message"""
         msg_type = message.get('type', '')
         
-        if msg_type == 'TICK' or msg_type == 'TRADE':
-            if 'tick_callback' in self.callbacks:
-                self.callbacks['tick_callback'](message)
-        elif msg_type == 'QUOTE' or msg_type == 'BBO':
-            if 'quote_callback' in self.callbacks:
-                self.callbacks['quote_callback'](message)
-        elif msg_type == 'DEPTH' or msg_type == 'LEVEL2':
-            if 'level2_callback' in self.callbacks:
-                self.callbacks['level2_callback'](message)
+        callback = self._dispatch.get(msg_type)
+        if callback is not None:
+            callback(message)
+        elif msg_type in self.DATA_TYPES:
+            pass  # no callback registered for this data type
         elif msg_type == 'STATUS':
             logger.info(f"Status: {message}")
         elif msg_type == 'ERROR':
@@ -117,9 +163,8 @@ class RTraderProPlugin:
             return False
         
         try:
-            # Send as JSON with newline delimiter
-            message_str = json.dumps(message) + '\n'
-            self.socket.send(message_str.encode('utf-8'))
+            # Send as JSON with newline delimiter; sendall retries partial writes
+            self.socket.sendall(_dumps(message) + _NL)
             return True
         except Exception as e:
             logger.error(f"Failed to send message: {e}")
@@ -149,23 +194,39 @@ class RTraderProPlugin:
     def set_callback(self, callback_type: str, callback: Callable):
         """Set callback function for specific data type"""
         self.callbacks[callback_type] = callback
+        for msg_type in self.CALLBACK_TYPES.get(callback_type, ()):
+            self._dispatch[msg_type] = callback
     
     def disconnect(self):
         """Disconnect from R|Trader Pro"""
         self.running = False
         self.connected = False
         if self.socket:
+            try:
+                self.socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            if self._rfile is not None:
+                try:
+                    self._rfile.close()
+                except OSError:
+                    pass
             try:
                 self.socket.close()
-            except:
+            except OSError:
                 pass
         logger.info("Disconnected from R|Trader Pro")
 
 
 class RTraderProDataCollector:
+    # Smallest tick batch written with COPY; smaller ones use the prepared INSERT
+    COPY_MIN_ROWS = 50
+    
     def __init__(self):
         self.running = True
+        self._stopped = threading.Event()
         self.db_conn = None
+        self._cursor = None
         self.redis_client = None
         self.rtrader_client = None
         self.symbols = []
@@ -193,14 +254,56 @@ class RTraderProDataCollector:
         symbols_str = os.getenv('SYMBOLS', 'GCQ5,MGCQ5')
         self.symbols = [s.strip() for s in symbols_str.split(',')]
         
-        # Track subscribed symbols
+        # (symbol, exchange) pairs parsed once (format: SYMBOL or SYMBOL:EXCHANGE)
+        self._symbol_specs = [
+            tuple(s.split(':', 1)) if ':' in s else (s, 'CME')  # Default exchange
+            for s in self.symbols
+        ]
+        
+        # Track subscribed (symbol, exchange) pairs
         self.subscribed_symbols = set()
+        
+        # Messages parsed by the listener wait here for the writer thread, so
+        # database latency never stalls the socket reads
+        self._q = queue.Queue(maxsize=int(os.getenv('WRITE_QUEUE_SIZE', 10000)))
+        self._dropped = 0
+        
+        # The writer takes up to batch_size messages, waiting at most
+        # flush_interval seconds, and stores them with one commit
+        self.batch_size = int(os.getenv('TICK_BATCH_SIZE', 5000))
+        self.flush_interval = float(os.getenv('TICK_FLUSH_INTERVAL', 0.2))
+        self._db_lock = threading.Lock()  # writer and sweeper share db_conn
+        
+        # Latest Level 2 timestamp per symbol, for the periodic stale-level sweep
+        self._level2_latest: Dict[str, datetime] = {}
+        self.level2_sweep_interval = float(os.getenv('LEVEL2_SWEEP_INTERVAL', 30))
     
     def connect_database(self):
         """Connect to PostgreSQL database"""
         try:
             self.db_conn = psycopg2.connect(**self.db_config)
             self.db_conn.autocommit = False
+            
+            # One cursor for the life of the connection; single-tick batches
+            # go through a statement parsed and planned once here
+            self._cursor = self.db_conn.cursor()
+            
+            # Market data is replayable, so don't wait for a WAL flush on every
+            # batch commit (a crash can lose the last moments of data, never
+            # corrupt it); DB_SYNCHRONOUS_COMMIT=on restores full durability
+            self._cursor.execute(
+                "SELECT set_config('synchronous_commit', %s, false)",
+                (os.getenv('DB_SYNCHRONOUS_COMMIT', 'off'),)
+            )
+            self._cursor.execute("""
+                PREPARE tick_ins (text, text, timestamptz, numeric, int, numeric, numeric, int, int) AS
+                INSERT INTO tick_data (
+                    symbol, exchange, timestamp, price, size,
+                    bid_price, ask_price, bid_size, ask_size
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+            """)
+            self.db_conn.commit()
+            
             logger.info("Connected to PostgreSQL database")
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}")
@@ -237,143 +340,266 @@ class RTraderProDataCollector:
     
     def _handle_tick_data(self, data: Dict):
         """Handle incoming tick/trade data from R|Trader Pro"""
-        try:
-            cursor = self.db_conn.cursor()
-            
-            # Extract data fields
-            timestamp = data.get('timestamp', datetime.now())
-            if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp)
-            
-            # Insert tick data
-            insert_query = """
-                INSERT INTO tick_data (
-                    symbol, exchange, timestamp, price, size,
-                    bid_price, ask_price, bid_size, ask_size
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            cursor.execute(insert_query, (
-                data.get('symbol'),
-                data.get('exchange', 'CME'),
-                timestamp,
-                Decimal(str(data.get('price', 0))),
-                data.get('size', 0),
-                Decimal(str(data.get('bid_price', 0))) if data.get('bid_price') else None,
-                Decimal(str(data.get('ask_price', 0))) if data.get('ask_price') else None,
-                data.get('bid_size'),
-                data.get('ask_size')
-            ))
-            
-            self.db_conn.commit()
-            logger.debug(f"Stored tick data for {data.get('symbol')}")
-            
-        except Exception as e:
-            logger.error(f"Failed to store tick data: {e}")
-            self.db_conn.rollback()
+        self._enqueue(_TICK, data)
     
     def _handle_quote_data(self, data: Dict):
         """Handle incoming quote data from R|Trader Pro"""
-        try:
-            # Quote data can be stored as tick data with bid/ask prices
-            self._handle_tick_data(data)
-        except Exception as e:
-            logger.error(f"Failed to handle quote data: {e}")
+        # Quote data can be stored as tick data with bid/ask prices
+        self._enqueue(_TICK, data)
     
     def _handle_level2_data(self, data: Dict):
         """Handle incoming Level 2 data from R|Trader Pro"""
+        self._enqueue(_LEVEL2, data)
+    
+    def _enqueue(self, kind: int, data: Dict):
+        """Hand a message to the writer thread, dropping it if the queue is full"""
         try:
-            cursor = self.db_conn.cursor()
-            
-            # Extract timestamp
-            timestamp = data.get('timestamp', datetime.now())
-            if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp)
-            
-            # Clear old Level 2 data for this symbol
-            delete_query = """
-                DELETE FROM level2_data 
-                WHERE symbol = %s AND timestamp < %s - INTERVAL '1 minute'
-            """
-            cursor.execute(delete_query, (data.get('symbol'), timestamp))
-            
-            # Insert new Level 2 data
-            insert_query = """
+            self._q.put_nowait((kind, data))
+        except queue.Full:
+            self._dropped += 1
+            if self._dropped % 1000 == 1:
+                logger.warning(f"Write queue full, {self._dropped} messages dropped so far")
+    
+    def _writer_loop(self):
+        """Store queued messages in batches until stopped and drained"""
+        while self.running or not self._q.empty():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                # psycopg2 marks the connection closed once the server drops it
+                if self.db_conn.closed:
+                    with self._db_lock:
+                        self.connect_database()
+                self.write_batch(batch)
+            except Exception as e:
+                # Keep the writer alive; the next batch retries the connection
+                logger.error(f"Dropped batch of {len(batch)} messages: {e}")
+    
+    def _rollback(self):
+        """Roll back the current transaction, tolerating a dead connection"""
+        try:
+            self.db_conn.rollback()
+        except psycopg2.Error as e:
+            logger.warning(f"Rollback failed: {e}")
+    
+    def _next_batch(self) -> List[tuple]:
+        """Take up to batch_size queued messages, waiting at most flush_interval"""
+        try:
+            batch = [self._q.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._q.get_nowait())
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        return batch
+    
+    def write_batch(self, batch: List[tuple]):
+        """COPY the batch's ticks, insert its Level 2 levels in one statement, commit once"""
+        tick_rows = []
+        level2_rows = []
+        level2_latest = {}
+        
+        for kind, data in batch:
+            try:
+                get = data.get
+                if get('symbol') is None:
+                    raise ValueError("missing symbol")
+                
+                # Extract timestamp (only fall back to now() when it is missing).
+                # ISO strings are parsed to validate them, but ticks keep the
+                # original text: formatting the datetime back for COPY would
+                # cost more than the parse
+                raw_timestamp = timestamp = get('timestamp')
+                if timestamp is None:
+                    raw_timestamp = timestamp = datetime.now()
+                elif isinstance(timestamp, str):
+                    timestamp = _parse_timestamp(timestamp)
+                elif not isinstance(timestamp, datetime):
+                    raise ValueError(f"unsupported timestamp {timestamp!r}")
+                
+                if kind == _TICK:
+                    tick_rows.append((
+                        get('symbol'),
+                        get('exchange', 'CME'),
+                        raw_timestamp,
+                        get('price', 0),
+                        get('size', 0),
+                        get('bid_price') or None,
+                        get('ask_price') or None,
+                        get('bid_size'),
+                        get('ask_size')
+                    ))
+                else:
+                    symbol = get('symbol')
+                    exchange = get('exchange', 'CME')
+                    
+                    # Top 10 bid levels, then top 10 ask levels
+                    level2_rows.extend(
+                        (symbol, exchange, timestamp, 'B', level, bid.get('price', 0), bid.get('size', 0))
+                        for level, bid in enumerate(get('bids', [])[:10], 1)
+                    )
+                    level2_rows.extend(
+                        (symbol, exchange, timestamp, 'S', level, ask.get('price', 0), ask.get('size', 0))
+                        for level, ask in enumerate(get('asks', [])[:10], 1)
+                    )
+                    level2_latest[symbol] = timestamp
+            except Exception as e:
+                logger.error(f"Skipping malformed message {data}: {e}")
+        
+        with self._db_lock:
+            try:
+                cursor = self._cursor
+                if len(tick_rows) >= self.COPY_MIN_ROWS:
+                    tick_buf = io.StringIO()
+                    csv.writer(tick_buf, lineterminator='\n').writerows(tick_rows)
+                    tick_buf.seek(0)
+                    cursor.copy_expert("""
+                        COPY tick_data (
+                            symbol, exchange, timestamp, price, size,
+                            bid_price, ask_price, bid_size, ask_size
+                        ) FROM STDIN WITH CSV
+                    """, tick_buf)
+                elif tick_rows:
+                    # COPY costs an extra round trip; for a few ticks, send the
+                    # prepared INSERTs as one multi-statement round trip instead
+                    execute_batch(
+                        cursor,
+                        "EXECUTE tick_ins (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                        tick_rows,
+                        page_size=self.COPY_MIN_ROWS
+                    )
+                if level2_rows:
+                    execute_values(cursor, """
+                        INSERT INTO level2_data (
+                            symbol, exchange, timestamp, side, level, price, size
+                        ) VALUES %s
+                    """, level2_rows, page_size=1000)
+                
+                self.db_conn.commit()
+                
+                # Old levels for these symbols are cleared by _level2_sweeper
+                self._level2_latest.update(level2_latest)
+                logger.debug(f"Stored {len(tick_rows)} ticks and {len(level2_rows)} Level 2 rows")
+                
+            except Exception as e:
+                # One bad row fails the whole statement; keep the rest of the batch
+                if self.db_conn.closed:
+                    raise
+                logger.warning(f"Failed to store batch of {len(batch)} messages, retrying row by row: {e}")
+                self._rollback()
+                self._write_rows(tick_rows, level2_rows)
+                self._level2_latest.update(level2_latest)
+    
+    def _write_rows(self, tick_rows: List[tuple], level2_rows: List[tuple]):
+        """Store rows one at a time, skipping only those the database rejects"""
+        cursor = self._cursor
+        statements = [
+            ("EXECUTE tick_ins (%s, %s, %s, %s, %s, %s, %s, %s, %s)", tick_rows),
+            ("""
                 INSERT INTO level2_data (
                     symbol, exchange, timestamp, side, level, price, size
                 ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            # Insert bid levels
-            for level, bid in enumerate(data.get('bids', [])[:10]):  # Top 10 levels
-                cursor.execute(insert_query, (
-                    data.get('symbol'),
-                    data.get('exchange', 'CME'),
-                    timestamp,
-                    'B',
-                    level + 1,
-                    Decimal(str(bid.get('price', 0))),
-                    bid.get('size', 0)
-                ))
-            
-            # Insert ask levels
-            for level, ask in enumerate(data.get('asks', [])[:10]):  # Top 10 levels
-                cursor.execute(insert_query, (
-                    data.get('symbol'),
-                    data.get('exchange', 'CME'),
-                    timestamp,
-                    'S',
-                    level + 1,
-                    Decimal(str(ask.get('price', 0))),
-                    ask.get('size', 0)
-                ))
-            
-            self.db_conn.commit()
-            logger.debug(f"Stored Level 2 data for {data.get('symbol')}")
-            
-        except Exception as e:
-            logger.error(f"Failed to store Level 2 data: {e}")
-            self.db_conn.rollback()
+            """, level2_rows),
+        ]
+        failed = 0
+        for sql, rows in statements:
+            for row in rows:
+                try:
+                    cursor.execute(sql, row)
+                    self.db_conn.commit()
+                except Exception as e:
+                    if self.db_conn.closed:
+                        raise
+                    failed += 1
+                    logger.error(f"Skipping row {row}: {e}")
+                    self._rollback()
+        logger.info(f"Stored {len(tick_rows) + len(level2_rows) - failed} rows row by row, {failed} rejected")
+    
+    def sweep_level2_data(self):
+        """Delete Level 2 rows older than one minute before each symbol's latest snapshot"""
+        latest = list(self._level2_latest.items())
+        if not latest:
+            return
+        
+        with self._db_lock:
+            try:
+                cursor = self._cursor
+                for symbol, timestamp in latest:
+                    cursor.execute("""
+                        DELETE FROM level2_data 
+                        WHERE symbol = %s AND timestamp < %s - INTERVAL '1 minute'
+                    """, (symbol, timestamp))
+                
+                self.db_conn.commit()
+                
+            except Exception as e:
+                logger.error(f"Failed to sweep Level 2 data: {e}")
+                self._rollback()
+    
+    def _level2_sweeper(self):
+        """Clear stale Level 2 data periodically instead of on every snapshot"""
+        while self.running:
+            time.sleep(self.level2_sweep_interval)
+            self.sweep_level2_data()
     
     def subscribe_symbols(self):
         """Subscribe to market data for configured symbols"""
         logger.info(f"Subscribing to symbols: {self.symbols}")
         
-        for symbol in self.symbols:
-            # Parse symbol and exchange (format: SYMBOL or SYMBOL:EXCHANGE)
-            if ':' in symbol:
-                sym, exchange = symbol.split(':')
-            else:
-                sym = symbol
-                exchange = 'CME'  # Default exchange
-            
+        for sym, exchange in self._symbol_specs:
             if self.rtrader_client.subscribe_market_data(sym, exchange):
-                self.subscribed_symbols.add(symbol)
+                self.subscribed_symbols.add((sym, exchange))
                 logger.info(f"Subscribed to {sym} on {exchange}")
             else:
                 logger.error(f"Failed to subscribe to {sym}")
     
-    def check_new_subscriptions(self):
-        """Check Redis for new symbol subscription requests"""
+    def apply_subscription(self, message: str):
+        """Subscribe to a symbol requested through Redis"""
         try:
-            # Check for new subscription messages
-            message = self.redis_client.lpop('symbol_subscriptions')
-            if message:
-                data = json.loads(message)
-                symbol = data['symbol']
-                exchange = data.get('exchange', 'CME')
-                
-                full_symbol = f"{symbol}:{exchange}"
-                if full_symbol not in self.subscribed_symbols:
-                    if self.rtrader_client.subscribe_market_data(symbol, exchange):
-                        self.subscribed_symbols.add(full_symbol)
-                        logger.info(f"Added new subscription: {symbol} on {exchange}")
+            data = _loads(message)
+            symbol = data['symbol']
+            exchange = data.get('exchange', 'CME')
+            
+            spec = (symbol, exchange)
+            if spec not in self.subscribed_symbols:
+                if self.rtrader_client.subscribe_market_data(symbol, exchange):
+                    self.subscribed_symbols.add(spec)
+                    logger.info(f"Added new subscription: {symbol} on {exchange}")
         except Exception as e:
-            logger.error(f"Failed to check new subscriptions: {e}")
+            logger.error(f"Failed to apply subscription {message!r}: {e}")
+    
+    def _subscription_worker(self):
+        """Block on Redis for subscription requests and apply each as it arrives"""
+        # BLPOP holds a pooled connection while it waits; other commands use another
+        while self.running:
+            try:
+                item = self.redis_client.blpop('symbol_subscriptions', timeout=5)
+                if item:
+                    self.apply_subscription(item[1])
+            except Exception as e:
+                logger.error(f"Failed to check new subscriptions: {e}")
+                time.sleep(1)
+    
+    def stop(self):
+        """Ask run() to shut the collector down"""
+        self.running = False
+        self._stopped.set()
     
     def run(self):
         """Main collector loop"""
         logger.info("Starting R|Trader Pro Data Collector...")
+        writer_thread = None
         
         try:
             # Connect to services
@@ -382,22 +608,26 @@ class RTraderProDataCollector:
             self.connect_rtrader_pro()
             self.subscribe_symbols()
             
+            # Parsed messages are stored from this thread; see _enqueue
+            writer_thread = threading.Thread(target=self._writer_loop, name='db-writer')
+            writer_thread.daemon = True
+            writer_thread.start()
+            
+            sweeper_thread = threading.Thread(target=self._level2_sweeper, name='level2-sweeper')
+            sweeper_thread.daemon = True
+            sweeper_thread.start()
+            
+            subscription_thread = threading.Thread(target=self._subscription_worker, name='subscriptions')
+            subscription_thread.daemon = True
+            subscription_thread.start()
+            
             logger.info("Collector started successfully, waiting for data...")
             
-            # Main collection loop
-            while self.running:
-                try:
-                    # Check for new symbol subscriptions
-                    self.check_new_subscriptions()
-                    
-                    # Sleep briefly to prevent CPU spinning
-                    asyncio.get_event_loop().run_until_complete(asyncio.sleep(1))
-                    
-                except KeyboardInterrupt:
-                    break
-                except Exception as e:
-                    logger.error(f"Error in main loop: {e}")
-                    asyncio.get_event_loop().run_until_complete(asyncio.sleep(1))
+            # The work happens on the threads above; block until stop() or Ctrl+C
+            try:
+                self._stopped.wait()
+            except KeyboardInterrupt:
+                pass
             
         except Exception as e:
             logger.error(f"Fatal error: {e}")
@@ -405,9 +635,13 @@ class RTraderProDataCollector:
         finally:
             # Cleanup
             logger.info("Shutting down collector...")
+            self.running = False
             if self.rtrader_client:
                 self.rtrader_client.disconnect()
             if self.db_conn:
+                # The writer exits once the queue is drained
+                if writer_thread is not None:
+                    writer_thread.join(timeout=10)
                 self.db_conn.close()
             if self.redis_client:
                 self.redis_client.close()
@@ -1,13 +1,11 @@
 import socket
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 def scan_port(port):
     """Kiểm tra xem một port có đang mở trên localhost không."""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.settimeout(0.5)  # Đặt timeout ngắn để không phải chờ lâu
-    result = sock.connect_ex(('localhost', port))
-    sock.close()
-    return result == 0
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.5)  # Đặt timeout ngắn để không phải chờ lâu
+        return sock.connect_ex(('localhost', port)) == 0
 
 print("=== Scanning for R|Trader Pro ports ===\n")
 
@@ -21,14 +19,16 @@ ports_to_check = [
 
 open_ports = []
 
-# Quét tất cả các cổng trong danh sách
-for port in ports_to_check:
-    if scan_port(port):
+# Quét tất cả các cổng song song: tổng thời gian chỉ còn khoảng một lần timeout
+with ThreadPoolExecutor(max_workers=len(ports_to_check)) as executor:
+    results = executor.map(scan_port, ports_to_check)
+
+for port, is_open in zip(ports_to_check, results):
+    if is_open:
         print(f"✅ Port {port} is OPEN")
         open_ports.append(port)
     else:
         print(f"❌ Port {port} is closed")
-    time.sleep(0.1)  # Chờ một chút giữa mỗi lần quét
 
 print(f"\n>>> Open ports found: {open_ports}\n")
 
@@ -1,20 +1,50 @@
+import asyncio
 import socket
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def probe_rtrader(port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    result = sock.connect_ex(('localhost', port))
+    sock.close()
+    return result == 0
+
+def probe_postgres():
+    import psycopg2
+    conn = psycopg2.connect(
+        host='localhost',
+        port=5432,
+        database='rithmic_db',
+        user='postgres',
+        password='postgres'
+    )
+    conn.close()
+
+def probe_redis():
+    import redis
+    r = redis.Redis(host='localhost', port=6379)
+    r.ping()
+
+async def run_probes(rtrader_port):
+    # The three checks are independent, so their timeouts overlap instead of adding up
+    return await asyncio.gather(
+        asyncio.to_thread(probe_rtrader, rtrader_port),
+        asyncio.to_thread(probe_postgres),
+        asyncio.to_thread(probe_redis),
+        return_exceptions=True
+    )
+
 def test_connections():
     print("=== Testing Connections ===\n")
     
-    # Test R|Trader Pro
     rtrader_port = int(os.getenv('RTRADER_PORT', 3013))
-    print(f"1. Testing R|Trader Pro on port {rtrader_port}...")
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    result = sock.connect_ex(('localhost', rtrader_port))
-    sock.close()
+    rtrader_result, postgres_result, redis_result = asyncio.run(run_probes(rtrader_port))
     
-    if result == 0:
+    # Test R|Trader Pro
+    print(f"1. Testing R|Trader Pro on port {rtrader_port}...")
+    if rtrader_result is True:
         print(f"   ✅ R|Trader Pro is running on port {rtrader_port}")
     else:
         print(f"   ❌ R|Trader Pro is NOT running on port {rtrader_port}")
@@ -25,29 +55,17 @@ def test_connections():
     
     # Test Database
     print("\n2. Testing PostgreSQL...")
-    try:
-        import psycopg2
-        conn = psycopg2.connect(
-            host='localhost',
-            port=5432,
-            database='rithmic_db',
-            user='postgres',
-            password='postgres'
-        )
-        conn.close()
+    if isinstance(postgres_result, Exception):
+        print(f"   ❌ PostgreSQL error: {postgres_result}")
+    else:
         print("   ✅ PostgreSQL is running")
-    except Exception as e:
-        print(f"   ❌ PostgreSQL error: {e}")
     
     # Test Redis
     print("\n3. Testing Redis...")
-    try:
-        import redis
-        r = redis.Redis(host='localhost', port=6379)
-        r.ping()
+    if isinstance(redis_result, Exception):
+        print(f"   ❌ Redis error: {redis_result}")
+    else:
         print("   ✅ Redis is running")
-    except Exception as e:
-        print(f"   ❌ Redis error: {e}")
 
 if __name__ == "__main__":
-    test_connections()
\ No newline at end of file
+    test_connections()
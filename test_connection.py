@@ -23,6 +23,49 @@ logger = logging.getLogger(__name__)
 # Enable Rithmic library debug logging
 logging.getLogger("rithmic").setLevel(logging.DEBUG)
 
+CONNECT_TIMEOUT = float(os.getenv('RITHMIC_CONNECT_TIMEOUT', '10'))
+
+async def try_system(test_system, user, password, app_name, app_version, url):
+    """Connect with one system name; returns the name on success, None on failure"""
+    logger.info(f"\n🔄 Testing system_name: '{test_system}'")
+    
+    # Create client
+    client = RithmicClient(
+        user=user,
+        password=password,
+        system_name=test_system,
+        app_name=app_name,
+        app_version=app_version,
+        url=url
+    )
+    
+    # Add connection event handlers
+    async def on_connected(plant_type: str):
+        logger.info(f"✅ Successfully connected to plant: {plant_type}")
+    
+    async def on_disconnected(plant_type: str):
+        logger.warning(f"❌ Disconnected from plant: {plant_type}")
+    
+    client.on_connected += on_connected
+    client.on_disconnected += on_disconnected
+    
+    try:
+        logger.info(f"Attempting to connect with '{test_system}'...")
+        await asyncio.wait_for(client.connect(), CONNECT_TIMEOUT)
+        logger.info(f"✅ SUCCESS! '{test_system}' works!")
+        return test_system
+        
+    except Exception as e:
+        logger.error(f"❌ '{test_system}' failed: {e}")
+        logger.error(f"Error type: {type(e).__name__}")
+        return None
+        
+    finally:
+        try:
+            await client.disconnect()
+        except Exception:
+            pass
+
 async def test_connection():
     """Test basic connection to Rithmic"""
     
@@ -56,46 +99,21 @@ async def test_connection():
         logger.error("Missing RITHMIC_USER or RITHMIC_PASSWORD in environment")
         return False
     
-    # Test each system name
-    for test_system in test_systems:
-        logger.info(f"\n🔄 Testing system_name: '{test_system}'")
-        try:
-            # Create client
-            client = RithmicClient(
-                user=user,
-                password=password,
-                system_name=test_system,
-                app_name=app_name,
-                app_version=app_version,
-                url=url
-            )
-            
-            # Add connection event handlers
-            async def on_connected(plant_type: str):
-                logger.info(f"✅ Successfully connected to plant: {plant_type}")
-            
-            async def on_disconnected(plant_type: str):
-                logger.warning(f"❌ Disconnected from plant: {plant_type}")
-            
-            client.on_connected += on_connected
-            client.on_disconnected += on_disconnected
-            
-            logger.info(f"Attempting to connect with '{test_system}'...")
-            await client.connect()
-            
-            logger.info(f"✅ SUCCESS! '{test_system}' works! Waiting 3 seconds...")
-            await asyncio.sleep(3)
-            
-            logger.info("Disconnecting...")
-            await client.disconnect()
-            
-            logger.info(f"✅ Test completed successfully with '{test_system}'")
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ '{test_system}' failed: {e}")
-            logger.error(f"Error type: {type(e).__name__}")
-            continue
+    # Try every system name at once and keep the first that connects
+    tasks = [
+        asyncio.create_task(try_system(test_system, user, password, app_name, app_version, url))
+        for test_system in test_systems
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            working_system = await next_done
+            if working_system:
+                logger.info(f"✅ Test completed successfully with '{working_system}'")
+                return True
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
     
     logger.error("❌ All system names failed!")
     return False
@@ -1,16 +1,21 @@
 # test_host_connection.py
 import socket
+from concurrent.futures import ThreadPoolExecutor
 
-def test_port(host, port):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.settimeout(2)
-    result = sock.connect_ex((host, port))
-    sock.close()
-    return result == 0
+def test_port(host, port, timeout=2):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        return sock.connect_ex((host, port)) == 0
+
+def test_ports(host, ports, timeout=2):
+    # Thử mọi port song song, nên tổng thời gian chờ chỉ là một timeout
+    with ThreadPoolExecutor(max_workers=len(ports)) as executor:
+        results = executor.map(lambda port: test_port(host, port, timeout), ports)
+    return dict(zip(ports, results))
 
 # Test các port
-for port in [3010, 3011, 3012, 3013]:
-    if test_port('localhost', port):
+for port, is_open in test_ports('localhost', [3010, 3011, 3012, 3013]).items():
+    if is_open:
         print(f"✅ Port {port} is OPEN")
     else:
-        print(f"❌ Port {port} is CLOSED")
\ No newline at end of file
+        print(f"❌ Port {port} is CLOSED")
@@ -4,11 +4,16 @@ Test R|Trader Pro Binary Protocol Connection
 Tests all 4 ports and verifies data flow
 """
 
-import socket
 import struct
 import time
 import asyncio
 
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
 class RithmicPortTester:
     def __init__(self):
         self.ports = {
@@ -18,15 +23,17 @@ class RithmicPortTester:
             3013: "History Plant (Historical Data)"
         }
         
-    def test_tcp_connection(self, host='localhost', port=3010):
-        """Test basic TCP connection"""
+    async def probe_port(self, host='localhost', port=3010, timeout=2.0):
+        """Test basic TCP connection without blocking the event loop"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)
-            result = sock.connect_ex((host, port))
-            sock.close()
-            return result == 0
-        except:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port),
+                timeout=timeout
+            )
+            writer.close()
+            await writer.wait_closed()
+            return True
+        except Exception:
             return False
     
     async def test_binary_protocol(self, host='localhost', port=3010):
@@ -60,27 +67,48 @@ class RithmicPortTester:
             print(f"❌ Binary protocol test failed: {e}")
             return False
     
-    def test_all_ports(self, host='localhost'):
-        """Test all Rithmic ports"""
+    def start_probes(self, hosts=('localhost',)):
+        """Start a probe task for every host x port pair"""
+        return {
+            (host, port): asyncio.create_task(self.probe_port(host, port))
+            for host in hosts for port in self.ports
+        }
+    
+    async def first_active_port(self, probes, preference=(3010, 3013, 3011, 3012)):
+        """Return the first (host, port) that accepts a connection, without waiting for the rest"""
+        rank = {port: i for i, port in enumerate(preference)}
+        targets = {task: target for target, task in probes.items()}
+        pending = set(targets)
+        
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            active = [targets[task] for task in done if task.result()]
+            if active:
+                # Probes that finish together are ranked by port preference
+                return min(active, key=lambda target: rank.get(target[1], len(rank)))
+        
+        return None
+    
+    async def test_all_ports(self, hosts=('localhost',), probes=None):
+        """Test all Rithmic ports on every host concurrently"""
         print("="*60)
         print("R|TRADER PRO PORT TEST")
         print("="*60)
-        print(f"Testing host: {host}\n")
+        print(f"Testing hosts: {', '.join(hosts)}\n")
         
-        results = {}
+        # All probes run at once, so the sweep takes one timeout instead of one per port
+        if probes is None:
+            probes = self.start_probes(hosts)
+        outcomes = await asyncio.gather(*probes.values())
+        results = dict(zip(probes, outcomes))
         
-        for port, description in self.ports.items():
-            print(f"Testing port {port} ({description})...")
+        for (host, port), ok in results.items():
+            print(f"Testing port {port} ({self.ports[port]}) on {host}...")
             
-            # Test TCP connection
-            tcp_ok = self.test_tcp_connection(host, port)
-            
-            if tcp_ok:
+            if ok:
                 print(f"  ✅ TCP connection successful")
-                results[port] = True
             else:
                 print(f"  ❌ TCP connection failed")
-                results[port] = False
             
             print()
         
@@ -88,9 +116,9 @@ class RithmicPortTester:
         print("="*60)
         print("SUMMARY:")
         print("="*60)
-        active_ports = [p for p, ok in results.items() if ok]
+        active_ports = [f"{host}:{port}" for (host, port), ok in results.items() if ok]
         if active_ports:
-            print(f"✅ Active ports: {', '.join(map(str, active_ports))}")
+            print(f"✅ Active ports: {', '.join(active_ports)}")
         else:
             print("❌ No active ports found!")
         
@@ -110,31 +138,40 @@ class RithmicPortTester:
         print("DIAGNOSTICS")
         print("="*60)
         
-        # Check if R|Trader Pro process is running
-        import subprocess
-        try:
-            result = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq Rithmic Trader Pro.exe'], 
-                                  capture_output=True, text=True)
-            if 'Rithmic Trader Pro.exe' in result.stdout:
-                print("✅ R|Trader Pro process is running")
-            else:
-                print("❌ R|Trader Pro process NOT found!")
-                print("   Please start R|Trader Pro first")
-        except:
-            print("⚠️  Could not check process status")
-        
-        # Check netstat for listening ports
-        try:
-            result = subprocess.run(['netstat', '-an'], capture_output=True, text=True)
-            for port in [3010, 3011, 3012, 3013]:
-                if f":{port}" in result.stdout and "LISTENING" in result.stdout:
-                    print(f"✅ Port {port} is LISTENING")
-                elif f":{port}" in result.stdout:
-                    print(f"⚠️  Port {port} found but not LISTENING")
+        if not HAS_PSUTIL:
+            print("⚠️  psutil not installed - cannot check process or port status")
+            print("   Install with: pip install psutil")
+        else:
+            # Check if R|Trader Pro process is running
+            try:
+                names = {p.info['name'] for p in psutil.process_iter(['name'])}
+                if 'Rithmic Trader Pro.exe' in names:
+                    print("✅ R|Trader Pro process is running")
                 else:
-                    print(f"❌ Port {port} not found in netstat")
-        except:
-            print("⚠️  Could not check netstat")
+                    print("❌ R|Trader Pro process NOT found!")
+                    print("   Please start R|Trader Pro first")
+            except Exception:
+                print("⚠️  Could not check process status")
+            
+            # Check the TCP table for listening ports
+            try:
+                listening = set()
+                seen = set()
+                for conn in psutil.net_connections(kind='tcp'):
+                    if conn.laddr:
+                        seen.add(conn.laddr.port)
+                        if conn.status == psutil.CONN_LISTEN:
+                            listening.add(conn.laddr.port)
+                
+                for port in self.ports:
+                    if port in listening:
+                        print(f"✅ Port {port} is LISTENING")
+                    elif port in seen:
+                        print(f"⚠️  Port {port} found but not LISTENING")
+                    else:
+                        print(f"❌ Port {port} not found in connection table")
+            except Exception:
+                print("⚠️  Could not check connection table")
         
         print("\n📝 Recommendations:")
         print("1. Ensure R|Trader Pro is running")
@@ -147,24 +184,19 @@ class RithmicPortTester:
 async def main():
     tester = RithmicPortTester()
     
-    # Test localhost
-    print("\n🔍 Testing localhost connections...")
-    local_results = tester.test_all_ports('localhost')
+    # Probe localhost and 127.0.0.1 in one sweep
+    hosts = ('localhost', '127.0.0.1')
+    probes = tester.start_probes(hosts)
     
-    # Test 127.0.0.1 
-    print("\n\n🔍 Testing 127.0.0.1 connections...")
-    ip_results = tester.test_all_ports('127.0.0.1')
-    
-    # Find active port
-    active_port = None
-    for port in [3010, 3013, 3011, 3012]:
-        if local_results.get(port) or ip_results.get(port):
-            active_port = port
-            break
-    
-    if active_port:
+    # Test data flow as soon as any port answers; slower probes keep running for the report
+    active = await tester.first_active_port(probes)
+    if active:
+        host, active_port = active
         print(f"\n\n🎯 Testing data flow on active port {active_port}...")
-        await tester.test_data_flow('localhost', active_port)
+        await tester.test_data_flow(host, active_port)
+    
+    print("\n\n🔍 Testing localhost and 127.0.0.1 connections...")
+    await tester.test_all_ports(hosts, probes)
     
     # Run diagnostics
     tester.diagnose_connection_issues()
@@ -3,35 +3,156 @@
 Test R|Trader Pro Plugin Connection
 """
 import socket
+import functools
+import gc
 import json
+import logging
+import os
+import selectors
+import struct
+import sys
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-def test_connection():
+# orjson is optional; fall back to the stdlib codec when unavailable
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+logger = logging.getLogger(__name__)
+
+# MSG_NOSIGNAL is Linux-only; R|Trader Pro itself runs on Windows
+_SEND_FLAGS = getattr(socket, 'MSG_NOSIGNAL', 0)
+
+# Large kernel receive buffer and reads so one recv drains many ticks
+RCVBUF_SIZE = 16 * 1024 * 1024
+READ_SIZE = 65536
+# Messages kept for the end-of-run dump, and progress line interval (power of two)
+PRINT_LOG_SIZE = 1000
+PROGRESS_MASK = 0x3FF
+# SO_LINGER on with zero timeout: close sends RST and skips TIME_WAIT
+_LINGER_ABORT = struct.pack('ii', 1, 0)
+
+def _new_socket():
+    """TCP socket with Nagle disabled so small frames go out immediately"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+def _dumps(obj) -> bytes:
+    """Serialize to JSON bytes"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+# Static frames are serialized once; the PING only splices in its timestamp (%a gives repr)
+@functools.lru_cache(maxsize=None)
+def _subscribe_frame(symbol, exchange):
+    """Newline-terminated SUBSCRIBE frame for a symbol's trades, quotes and depth"""
+    return _dumps({
+        'action': 'SUBSCRIBE',
+        'type': 'MARKET_DATA',
+        'symbol': symbol,
+        'exchange': exchange,
+        'data_types': ['TRADE', 'QUOTE', 'DEPTH']
+    }) + b'\n'
+
+_PING_TEMPLATE = b'{"action":"PING","type":"TEST","timestamp":%a}\n'
+# Dump line for a kept message prefix
+_MESSAGE_LINE = "📥 Message %d: %s...\n"
+
+class RTraderSession:
+    """Control and market data connections to R|Trader Pro, each opened once and reused"""
+    
+    def __init__(self, host='localhost', control_port=3013, data_port=3010):
+        self.host = host  # Use localhost when running outside Docker
+        self.control_port = control_port
+        self.data_port = data_port
+        self._control = None
+        self._data = None
+        # Failures from connect(), re-raised on first use of that connection
+        self._errors = {}
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        
+    def close(self):
+        """Close whichever connections were opened"""
+        for sock in (self._control, self._data):
+            if sock is not None:
+                # Test connections are disposable; repeated runs shouldn't pile up TIME_WAIT
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_ABORT)
+                sock.close()
+        self._control = None
+        self._data = None
+        
+    def connect(self):
+        """Open both connections in parallel so a down host costs one timeout, not two"""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {name: executor.submit(getattr, self, name) for name in ('control', 'data')}
+        self._errors = {name: future.exception() for name, future in futures.items()
+                        if future.exception() is not None}
+        
+    @property
+    def control(self):
+        """Control connection, opened on first use"""
+        error = self._errors.pop('control', None)
+        if error is not None:
+            raise error
+        if self._control is None:
+            # Resolve, create and connect in one call; tries every address localhost maps to
+            sock = socket.create_connection((self.host, self.control_port), timeout=5)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._control = sock
+        return self._control
+    
+    @property
+    def data(self):
+        """Market data connection, opened on first use"""
+        error = self._errors.pop('data', None)
+        if error is not None:
+            raise error
+        if self._data is None:
+            # Not create_connection: SO_RCVBUF must be set before connect so the
+            # TCP window is negotiated with it
+            sock = _new_socket()
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF_SIZE)
+            sock.settimeout(5)
+            sock.connect((self.host, self.data_port))
+            self._data = sock
+        return self._data
+    
+    def ping(self):
+        """Send a timestamped PING on the control connection and return the frame"""
+        frame = _PING_TEMPLATE % time.time()
+        self.control.sendall(frame, _SEND_FLAGS)
+        return frame
+    
+    def subscribe(self, symbol='GCQ5', exchange='CME'):
+        """Subscribe the market data connection to a symbol"""
+        self.data.sendall(_subscribe_frame(symbol, exchange), _SEND_FLAGS)
+
+def test_connection(session=None):
     """Test connection to R|Trader Pro Plugin API"""
-    host = 'localhost'  # Use localhost when running outside Docker
-    port = 3013
+    owned = session is None
+    if owned:
+        session = RTraderSession()
         
-    print(f"Testing connection to R|Trader Pro at {host}:{port}...")
+    print(f"Testing connection to R|Trader Pro at {session.host}:{session.control_port}...")
     
     try:
-        # Create socket
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(5)
-        
-        # Connect
-        sock.connect((host, port))
+        sock = session.control
         print("✅ Connected successfully!")
         
         # Send test message
-        test_msg = {
-            'action': 'PING',
-            'type': 'TEST',
-            'timestamp': time.time()
-        }
-        
-        msg_str = json.dumps(test_msg) + '\n'
-        sock.send(msg_str.encode('utf-8'))
-        print(f"📤 Sent: {test_msg}")
+        ping = session.ping()
+        print(f"📤 Sent: {ping.decode('utf-8').strip()}")
         
         # Try to receive response
         sock.settimeout(2)
@@ -41,11 +162,9 @@ def test_connection():
                 print(f"📥 Received: {response.decode('utf-8').strip()}")
             else:
                 print("⚠️  No response received (this might be normal)")
-        except socket.timeout:
+        except TimeoutError:  # socket.timeout is an alias of TimeoutError from Python 3.10
             print("⏱️  Response timeout (this might be normal)")
         
-        # Close connection
-        sock.close()
         print("\n✅ Connection test completed!")
         
         return True
@@ -67,49 +186,92 @@ def test_connection():
         print("4. Set port to 65000")
         print("5. Restart R|Trader Pro")
         return False
+        
+    finally:
+        if owned:
+            session.close()
 
-def test_market_data_subscription():
+def test_market_data_subscription(session=None):
     """Test subscribing to market data"""
-    host = 'localhost'
-    port = 3010
+    owned = session is None
+    if owned:
+        session = RTraderSession()
+    gc_was_enabled = gc.isenabled()
+    
+    # A profiler or tracer adds a callback per call/line and slows the receive loop
+    if sys.getprofile() is not None or sys.gettrace() is not None:
+        print("⚠️  A profiler/tracer is attached; receive throughput will be understated")
         
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.connect((host, port))
+        sock = session.data
         
         # Subscribe to a symbol
-        subscribe_msg = {
-            'action': 'SUBSCRIBE',
-            'type': 'MARKET_DATA',
-            'symbol': 'GCQ5',
-            'exchange': 'CME',
-            'data_types': ['TRADE', 'QUOTE', 'DEPTH']
-        }
-        
-        msg_str = json.dumps(subscribe_msg) + '\n'
-        sock.send(msg_str.encode('utf-8'))
+        session.subscribe('GCQ5', 'CME')
         print(f"\n📤 Sent subscription request for GCQ5")
         
         # Listen for data (10 seconds)
         print("👂 Listening for market data (10 seconds)...")
-        sock.settimeout(1)
-        
-        start_time = time.time()
+        deadline_ns = time.monotonic_ns() + 10_000_000_000
         message_count = 0
+        # Preallocated receive buffer: recv_into fills it, frames are scanned in place
+        buf = bytearray(READ_SIZE * 2)
+        view = memoryview(buf)
+        filled = 0
+        # Per-message printing dominates at feed rates; keep the latest frames and dump them once
+        recent = deque(maxlen=PRINT_LOG_SIZE)
+        
+        # Wait for readability instead of timing out recv; no exception on the data path
+        sock.setblocking(False)
+        sel = selectors.DefaultSelector()
+        sel.register(sock, selectors.EVENT_READ)
+        # No collector pauses during the listen window; restored in finally
+        gc.disable()
         
-        while time.time() - start_time < 10:
+        while True:
+            # Integer clock: no float per check, converted only for the select timeout
+            remaining_ns = deadline_ns - time.monotonic_ns()
+            if remaining_ns <= 0 or not sel.select(remaining_ns / 1e9):
+                break
             try:
-                data = sock.recv(4096)
-                if data:
-                    messages = data.decode('utf-8').strip().split('\n')
-                    for msg in messages:
-                        if msg:
-                            message_count += 1
-                            print(f"📥 Message {message_count}: {msg[:100]}...")
-            except socket.timeout:
-                continue
-        
-        sock.close()
+                received = sock.recv_into(view[filled:])
+            except BlockingIOError:
+                continue  # Spurious wakeup
+            if not received:
+                break  # R|Trader closed the connection
+            filled += received
+            
+            start = 0
+            end = buf.find(b'\n', 0, filled)
+            while end != -1:
+                if end > start:
+                    # Only the printed prefix is kept, decoded after the run
+                    recent.append(bytes(view[start:min(end, start + 100)]))
+                    message_count += 1
+                    if message_count & PROGRESS_MASK == 0:
+                        logger.debug("   ... %d messages so far", message_count)
+                start = end + 1
+                end = buf.find(b'\n', start, filled)
+            
+            # Frames can straddle reads; move the unterminated tail to the front
+            filled -= start
+            view[:filled] = view[start:start + filled]
+            if filled == len(buf):
+                # A single frame fills the buffer; double it
+                view.release()
+                buf.extend(bytes(len(buf)))
+                view = memoryview(buf)
+        
+        view.release()
+        sel.close()
+        sock.settimeout(5)
+        
+        if recent:
+            first = message_count - len(recent) + 1
+            sys.stdout.write(''.join(
+                _MESSAGE_LINE % (number, str(msg, 'utf-8', 'replace'))
+                for number, msg in enumerate(recent, first)
+            ))
+            sys.stdout.flush()
         
         if message_count > 0:
             print(f"\n✅ Received {message_count} messages!")
@@ -122,18 +284,47 @@ def test_market_data_subscription():
         
     except Exception as e:
         print(f"\n❌ Subscription test failed: {e}")
+        
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+        if owned:
+            session.close()
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Test R|Trader Pro Plugin connection')
+    parser.add_argument('--cpu', type=int,
+                        help='Pin the test to this CPU (Linux only); pick the core that services '
+                             'the NIC/loopback IRQ, see /proc/interrupts')
+    args = parser.parse_args()
+    
+    # Progress lines are DEBUG; LOG_LEVEL=DEBUG shows them
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'), format='%(message)s')
+    
+    # Receiving on the IRQ core keeps softirq, socket copy and parsing on the same cache
+    if args.cpu is not None:
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, {args.cpu})
+            print(f"📌 Pinned to CPU {args.cpu}")
+        else:
+            print("⚠️  --cpu is only supported on Linux; running unpinned")
+    
     print("=" * 60)
     print("R|Trader Pro Plugin Connection Test")
     print("=" * 60)
     
-    # Test basic connection
-    if test_connection():
-        print("\n" + "=" * 60)
-        print("Testing Market Data Subscription...")
-        print("=" * 60)
-        test_market_data_subscription()
+    # One session keeps each connection open across both tests
+    with RTraderSession() as session:
+        session.connect()
+        
+        # Test basic connection
+        if test_connection(session):
+            print("\n" + "=" * 60)
+            print("Testing Market Data Subscription...")
+            print("=" * 60)
+            test_market_data_subscription(session)
     
     print("\n" + "=" * 60)
     print("Test completed!")